@@ -1,9 +1,13 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional, Dict, Any
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from typing import List, Optional, Dict, Any, NoReturn
+from collections import Counter
 import networkx as nx
 from xml.etree import ElementTree as ET
 import io
+import os
 
 app = FastAPI(
     title="GraphML Visualizer API",
@@ -11,6 +15,81 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Допустимые значения
+ALLOWED_NODE_TYPES = {"service", "db", "cache", "queue", "external"}
+ALLOWED_EDGE_KINDS = {"sync", "async", "stream"}
+ALLOWED_CRITICALITY = {"low", "medium", "high"}
+
+# Лимиты на загрузку (переопределяются через переменные окружения)
+MAX_UPLOAD_BYTES = int(os.getenv("GRAPHML_MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+MAX_NODES = int(os.getenv("GRAPHML_MAX_NODES", 10000))
+MAX_EDGES = int(os.getenv("GRAPHML_MAX_EDGES", 50000))
+MAX_DEPTH = int(os.getenv("GRAPHML_MAX_DEPTH", 32))
+MAX_ATTR_LENGTH = int(os.getenv("GRAPHML_MAX_ATTR_LENGTH", 4096))
+MAX_TAGS_PER_ELEMENT = int(os.getenv("GRAPHML_MAX_TAGS_PER_ELEMENT", 64))
+
+# Размер блока при потоковом чтении загрузки
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Запас на multipart-заголовки поверх лимита на сам файл
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+UPLOAD_PATH = "/api/graphml-to-json"
+
+# Счётчики отклонённых запросов по причине
+REJECTED_REQUESTS: Counter = Counter()
+
+
+def reject(reason: str, status_code: int, detail: str) -> NoReturn:
+    """Учитывает отклонённый запрос в метриках и прерывает обработку"""
+    REJECTED_REQUESTS[reason] += 1
+    raise HTTPException(status_code=status_code, detail=detail)
+
+
+def upload_too_large_detail() -> str:
+    return f"File exceeds size limit of {MAX_UPLOAD_BYTES} bytes"
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Ограничивает тело запроса на загрузку ещё до разбора multipart:
+    по Content-Length и по фактически принятым байтам, чтобы
+    слишком большой файл не успевал целиком попасть во временный файл
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != UPLOAD_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        limit = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            REJECTED_REQUESTS["upload_bytes"] += 1
+            response = JSONResponse({"detail": upload_too_large_detail()}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    reject("upload_bytes", 413, upload_too_large_detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+# Лимит размера тела подключается до CORS, чтобы ответ 413 тоже получал CORS заголовки
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # CORS для фронтенда
 app.add_middleware(
     CORSMiddleware,
@@ -20,19 +99,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Допустимые значения
-ALLOWED_NODE_TYPES = {"service", "db", "cache", "queue", "external"}
-ALLOWED_EDGE_KINDS = {"sync", "async", "stream"}
-ALLOWED_CRITICALITY = {"low", "medium", "high"}
-
-
-def validate_xml(content: bytes) -> None:
-    """Валидация XML структуры"""
-    try:
-        ET.fromstring(content)
-    except ET.ParseError as e:
-        raise HTTPException(status_code=400, detail=f"Invalid XML: {str(e)}")
-
 
 def to_float(value) -> Optional[float]:
     """Конвертация в float с обработкой ошибок"""
@@ -51,14 +117,111 @@ def parse_tags(tags_str: str) -> List[str]:
     return [t.strip() for t in tags_str.split(",") if t.strip()]
 
 
-def parse_graphml_xml(content: bytes) -> Dict[str, Any]:
+def local_name(tag: str) -> str:
+    """Имя тега без namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+class GraphMLLimitGuard(ET.TreeBuilder):
+    """
+    Target для XML парсера: строит дерево и проверяет лимиты
+    по мере поступления тегов и текста, чтобы прервать разбор
+    сразу при первом нарушении
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.depth = 0
+        self.nodes = 0
+        self.edges = 0
+        # Длина текущего непрерывного текста (text или tail)
+        self.text_length = 0
+
+    def start(self, tag, attrs):
+        self.text_length = 0
+        name = local_name(tag)
+
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            reject("depth", 400, f"Nesting depth exceeds limit of {MAX_DEPTH}")
+
+        if name == 'node':
+            self.nodes += 1
+            if self.nodes > MAX_NODES:
+                reject("nodes", 413, f"Node count exceeds limit of {MAX_NODES}")
+        elif name == 'edge':
+            self.edges += 1
+            if self.edges > MAX_EDGES:
+                reject("edges", 413, f"Edge count exceeds limit of {MAX_EDGES}")
+
+        for attr, value in attrs.items():
+            if len(value) > MAX_ATTR_LENGTH:
+                reject(
+                    "attr_length", 400,
+                    f"Attribute '{local_name(attr)}' exceeds length limit of {MAX_ATTR_LENGTH}"
+                )
+
+        if name in ('node', 'edge'):
+            self.check_tags(attrs.get('tags', ''))
+
+        return super().start(tag, attrs)
+
+    def data(self, data):
+        # Текст приходит кусками по мере чтения, проверяем не дожидаясь закрывающего тега
+        self.text_length += len(data)
+        if self.text_length > MAX_ATTR_LENGTH:
+            reject("attr_length", 400, f"Text value exceeds length limit of {MAX_ATTR_LENGTH}")
+        super().data(data)
+
+    def end(self, tag):
+        self.text_length = 0
+        self.depth -= 1
+        elem = super().end(tag)
+        if local_name(tag) == 'data' and elem.get('key') == 'tags':
+            self.check_tags(elem.text or elem.get('value', ''))
+        return elem
+
+    def check_tags(self, tags_str: str) -> None:
+        if len(parse_tags(tags_str)) > MAX_TAGS_PER_ELEMENT:
+            reject("tags", 400, f"Tag count exceeds limit of {MAX_TAGS_PER_ELEMENT} per element")
+
+
+async def read_graphml_limited(file: UploadFile) -> Optional[ET.Element]:
     """
-    Парсит GraphML используя XML парсер напрямую
+    Читает загрузку блоками и сразу скармливает их XML парсеру.
+    При нарушении лимита чтение прерывается, а частично
+    построенное дерево освобождается вместе с парсером.
+    Возвращает корневой элемент или None для пустого файла
+    """
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        reject("upload_bytes", 413, upload_too_large_detail())
+
+    parser = ET.XMLParser(target=GraphMLLimitGuard())
+    received = 0
+
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            received += len(chunk)
+            if received > MAX_UPLOAD_BYTES:
+                reject("upload_bytes", 413, upload_too_large_detail())
+            parser.feed(chunk)
+
+        if received == 0:
+            return None
+
+        return parser.close()
+    except ET.ParseError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid XML: {str(e)}")
+    finally:
+        await file.close()
+
+
+def parse_graphml_xml(root: ET.Element) -> Dict[str, Any]:
+    """
+    Парсит GraphML дерево, построенное XML парсером
     Извлекает атрибуты из <data> элементов внутри узлов/рёбер
     и также из прямых атрибутов элементов
     """
-    root = ET.fromstring(content)
-    
     # Регистрируем namespace
     ns = {'g': 'http://graphml.graphdrawing.org/xmlns'}
     
@@ -135,18 +298,28 @@ async def root():
         "message": "GraphML Visualizer API v1.0.0",
         "endpoints": {
             "api": "/api/graphml-to-json",
+            "metrics": "/metrics",
             "docs": "/docs",
             "redoc": "/redoc"
         }
     }
 
 
-@app.post("/api/graphml-to-json")
+@app.get("/metrics")
+async def metrics():
+    """Счётчики отклонённых по лимитам запросов"""
+    return {
+        "rejected_requests_total": sum(REJECTED_REQUESTS.values()),
+        "rejected_requests": dict(REJECTED_REQUESTS),
+    }
+
+
+@app.post(UPLOAD_PATH)
 async def graphml_to_json(file: UploadFile = File(...)):
     """
     Преобразование GraphML файла в JSON
     
-    1. Валидирует XML структуру
+    1. Валидирует XML структуру и лимиты размера (прерывает разбор при нарушении)
     2. Парсит GraphML и извлекает узлы/рёбра
     3. Проверяет обязательные поля и значения
     4. Возвращает JSON с nodes и edges
@@ -159,17 +332,14 @@ async def graphml_to_json(file: UploadFile = File(...)):
             detail="File must have .graphml extension"
         )
     
-    # Чтение содержимого
-    content = await file.read()
-    if not content:
+    # Потоковое чтение и валидация XML с проверкой лимитов
+    root = await read_graphml_limited(file)
+    if root is None:
         raise HTTPException(status_code=400, detail="Empty file")
     
-    # Валидация как XML
-    validate_xml(content)
-    
     # Парсинг GraphML
     try:
-        parsed = parse_graphml_xml(content)
+        parsed = parse_graphml_xml(root)
         nodes_dict = parsed['nodes']
         edges_list = parsed['edges']
     except Exception as e:
@@ -7,9 +7,13 @@
 - HTTP endpoints
 """
 
+import asyncio
 import io
+import httpx
 import pytest
 from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+import main
 from main import app
 
 
@@ -263,6 +267,190 @@ class TestFileErrors:
         assert response.status_code == 422  # Unprocessable Entity
 
 
+# ===================== ТЕСТЫ ЛИМИТОВ =====================
+
+class TestResourceLimits:
+    """Тесты ограничений на размер и структуру загрузки"""
+
+    def post(self, content):
+        return client.post(
+            "/api/graphml-to-json",
+            files={"file": ("test.graphml", io.BytesIO(content))}
+        )
+
+    def send_streamed(self, content, chunk_size, with_content_length):
+        """Отправляет multipart тело блоками напрямую в ASGI приложение"""
+        request = httpx.Request(
+            "POST", "http://testserver/api/graphml-to-json",
+            files={"file": ("test.graphml", content)}
+        )
+        body = request.read()
+        chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        headers = [
+            (k.lower().encode(), v.encode()) for k, v in request.headers.items()
+            if with_content_length or k.lower() != "content-length"
+        ]
+        scope = {
+            "type": "http", "method": "POST", "path": "/api/graphml-to-json",
+            "raw_path": b"/api/graphml-to-json", "root_path": "", "query_string": b"",
+            "headers": headers, "http_version": "1.1", "scheme": "http",
+            "server": ("testserver", 80), "client": ("testclient", 50000),
+        }
+        consumed = 0
+        messages = []
+
+        async def receive():
+            nonlocal consumed
+            if consumed < len(chunks):
+                consumed += 1
+                return {
+                    "type": "http.request",
+                    "body": chunks[consumed - 1],
+                    "more_body": consumed < len(chunks),
+                }
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(main.app(scope, receive, send))
+        return messages[0]["status"], consumed, len(chunks)
+
+    def test_upload_too_large(self, monkeypatch, valid_graphml_content):
+        """Ошибка: файл больше лимита по размеру"""
+        monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 100)
+        response = self.post(valid_graphml_content)
+        assert response.status_code == 413
+        assert "size limit" in response.json()["detail"].lower()
+
+    def test_content_length_rejected_before_body(self, monkeypatch):
+        """Ошибка: Content-Length больше лимита, тело не читается"""
+        monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1000)
+        monkeypatch.setattr(main, "MULTIPART_OVERHEAD_BYTES", 0)
+        before = main.REJECTED_REQUESTS["upload_bytes"]
+        status, consumed, _ = self.send_streamed(b"x" * 5000, 1024, with_content_length=True)
+        assert status == 413
+        assert consumed == 0
+        assert main.REJECTED_REQUESTS["upload_bytes"] == before + 1
+
+    def test_streamed_body_aborted_early(self, monkeypatch):
+        """Ошибка: тело без Content-Length прерывается при превышении лимита"""
+        monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1000)
+        monkeypatch.setattr(main, "MULTIPART_OVERHEAD_BYTES", 0)
+        before = main.REJECTED_REQUESTS["upload_bytes"]
+        status, consumed, total = self.send_streamed(b"x" * 50000, 1024, with_content_length=False)
+        assert status == 413
+        assert consumed < total
+        assert main.REJECTED_REQUESTS["upload_bytes"] == before + 1
+
+    def test_limit_broken_in_later_chunk(self, monkeypatch):
+        """Ошибка в одном из следующих блоков прерывает чтение файла"""
+        monkeypatch.setattr(main, "MAX_NODES", 2)
+        reads = []
+        original_read = UploadFile.read
+
+        async def counting_read(self, size=-1):
+            reads.append(size)
+            return await original_read(self, size)
+
+        monkeypatch.setattr(UploadFile, "read", counting_read)
+        padding = b"<!--" + b"x" * main.UPLOAD_CHUNK_SIZE + b"-->"
+        content = (
+            b"<graphml><graph>" + padding
+            + b'<node id="n1" label="A" type="service"/>' * 3
+            + padding * 4 + b"</graph></graphml>"
+        )
+        response = self.post(content)
+        assert response.status_code == 413
+        assert "node count" in response.json()["detail"].lower()
+        assert len(reads) == 2
+
+    def test_content_at_limits_accepted(self, monkeypatch):
+        """Содержимое ровно на границе лимитов принимается"""
+        content = (
+            b'<graphml><graph>'
+            b'<node id="n1" label="Service" type="service" tags="a,b"/>'
+            b'<node id="n2" label="DB" type="db"/>'
+            b'<edge id="e1" source="n1" target="n2" label="Query" kind="sync" criticality="high"/>'
+            b'</graph></graphml>'
+        )
+        monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", len(content))
+        monkeypatch.setattr(main, "MAX_NODES", 2)
+        monkeypatch.setattr(main, "MAX_EDGES", 1)
+        monkeypatch.setattr(main, "MAX_DEPTH", 3)
+        monkeypatch.setattr(main, "MAX_ATTR_LENGTH", len("service"))
+        monkeypatch.setattr(main, "MAX_TAGS_PER_ELEMENT", 2)
+        response = self.post(content)
+        assert response.status_code == 200
+
+        monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", len(content) - 1)
+        assert self.post(content).status_code == 413
+
+    def test_too_many_nodes(self, monkeypatch, valid_graphml_content):
+        """Ошибка: узлов больше лимита"""
+        monkeypatch.setattr(main, "MAX_NODES", 2)
+        response = self.post(valid_graphml_content)
+        assert response.status_code == 413
+        assert "node count" in response.json()["detail"].lower()
+
+    def test_too_many_edges(self, monkeypatch, valid_graphml_content):
+        """Ошибка: рёбер больше лимита"""
+        monkeypatch.setattr(main, "MAX_EDGES", 1)
+        response = self.post(valid_graphml_content)
+        assert response.status_code == 413
+        assert "edge count" in response.json()["detail"].lower()
+
+    def test_nesting_too_deep(self):
+        """Ошибка: слишком глубокая вложенность"""
+        depth = main.MAX_DEPTH + 1
+        content = b"<graphml>" + b"<a>" * depth + b"</a>" * depth + b"</graphml>"
+        response = self.post(content)
+        assert response.status_code == 400
+        assert "depth" in response.json()["detail"].lower()
+
+    def test_attribute_too_long(self, monkeypatch):
+        """Ошибка: слишком длинное значение атрибута"""
+        monkeypatch.setattr(main, "MAX_ATTR_LENGTH", 10)
+        content = b"""<graphml><graph>
+    <node id="n1" label="Very long service label" type="service"/>
+  </graph></graphml>"""
+        response = self.post(content)
+        assert response.status_code == 400
+        assert "label" in response.json()["detail"].lower()
+
+    def test_text_between_elements_too_long(self, monkeypatch):
+        """Ошибка: длинный текст между элементами (tail) тоже ограничен"""
+        monkeypatch.setattr(main, "MAX_ATTR_LENGTH", 10)
+        content = (
+            b'<graphml><graph><node id="n1" label="A" type="service"/>'
+            + b"x" * 5000 + b"</graph></graphml>"
+        )
+        response = self.post(content)
+        assert response.status_code == 400
+        assert "length limit" in response.json()["detail"].lower()
+
+    def test_too_many_tags(self, monkeypatch):
+        """Ошибка: слишком много тегов у элемента"""
+        monkeypatch.setattr(main, "MAX_TAGS_PER_ELEMENT", 2)
+        content = b"""<graphml><graph>
+    <node id="n1" label="Service" type="service">
+      <data key="tags">a,b,c</data>
+    </node>
+  </graph></graphml>"""
+        response = self.post(content)
+        assert response.status_code == 400
+        assert "tag count" in response.json()["detail"].lower()
+
+    def test_rejections_in_metrics(self, monkeypatch, valid_graphml_content):
+        """Отклонённые запросы учитываются в /metrics"""
+        before = client.get("/metrics").json()
+        monkeypatch.setattr(main, "MAX_NODES", 1)
+        self.post(valid_graphml_content)
+        after = client.get("/metrics").json()
+        assert after["rejected_requests_total"] == before["rejected_requests_total"] + 1
+        assert after["rejected_requests"]["nodes"] == before["rejected_requests"].get("nodes", 0) + 1
+
+
 # ===================== ТЕСТЫ CORS =====================
 
 class TestCORS: